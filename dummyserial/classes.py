@@ -5,12 +5,22 @@
 
 import logging
 import logging.handlers
-import sys
 import time
+from typing import Any, Callable, ClassVar, Iterable, Optional
 
-from serial import SerialException, PortNotOpenError
+from serial import PortNotOpenError
 
-import dummyserial.constants
+try:
+    from mypy_extensions import mypyc_attr
+except ImportError:  # Only the optional mypyc build needs mypy_extensions.
+    def mypyc_attr(*_args: Any, **_kwargs: Any) -> Any:  # type: ignore[misc]
+        """No-op stand-in for mypy_extensions.mypyc_attr."""
+        return lambda cls: cls
+
+import dummyserial.exceptions
+from dummyserial.constants import (
+    BUFFER_COMPACT_SIZE, DEFAULT_BAUDRATE, DEFAULT_RESPONSE, DEFAULT_TIMEOUT,
+    LOG_FORMAT, LOG_LEVEL)
 import dummyserial.lookup as lookup
 
 __author__ = 'Greg Albrecht <gba@orionlabs.io>'
@@ -18,6 +28,19 @@ __license__ = 'Apache License, Version 2.0'
 __copyright__ = 'Copyright 2016 Orion Labs, Inc.'
 
 
+_LOGGER = logging.getLogger(__name__)
+if not _LOGGER.handlers:
+    _LOGGER.setLevel(LOG_LEVEL)
+    _CONSOLE_HANDLER = logging.StreamHandler()
+    _CONSOLE_HANDLER.setLevel(LOG_LEVEL)
+    _CONSOLE_HANDLER.setFormatter(LOG_FORMAT)
+    _LOGGER.addHandler(_CONSOLE_HANDLER)
+    _LOGGER.propagate = False
+
+
+# Compiled as a regular (non-native) class so that, like the pure Python
+# one, instances accept pySerial attributes, method patching and weakrefs.
+@mypyc_attr(native_class=False)
 class Serial():
     """
     Dummy (mock) serial port for testing purposes.
@@ -34,103 +57,165 @@ class Serial():
     :mod:`dummyserial` can be used simultaneously.
     """
 
-    _logger = logging.getLogger(__name__)
-    if not _logger.handlers:
-        _logger.setLevel(dummyserial.constants.LOG_LEVEL)
-        _console_handler = logging.StreamHandler()
-        _console_handler.setLevel(dummyserial.constants.LOG_LEVEL)
-        _console_handler.setFormatter(dummyserial.constants.LOG_FORMAT)
-        _logger.addHandler(_console_handler)
-        _logger.propagate = False
-
-    def __init__(self, *args, **kwargs):
+    _logger: ClassVar[logging.Logger] = _LOGGER
+
+    is_open: bool
+    baudrate: Any
+    port: Optional[str]
+    initial_port_name: Optional[str]
+    # Look-up results are checked at runtime by _check_response.
+    lookup: Callable[[bytes, bytes], Any]
+    lookup_func: Callable[[bytes, bytes], Any]
+    timeout: float
+    writeTimeout: float
+    _buf: bytearray
+    _pos: int
+    _debug: bool
+    _repr_prefix: str
+    _deadline: Optional[float]
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
         self._logger.debug('args=%s', args)
         self._logger.debug('kwargs=%s', kwargs)
 
-        self.is_open = True
-        self._waiting_data = dummyserial.constants.NO_DATA_PRESENT
+        # Checked once up front so hot paths skip building debug messages.
+        self._debug = self._logger.isEnabledFor(logging.DEBUG)
+
+        self.is_open = False
+        # Waiting data lives in _buf[_pos:]; reads advance the cursor and the
+        # consumed prefix is only dropped once in a while (see _consume).
+        self._buf = bytearray()
+        self._pos = 0
+        # Monotonic time at which the current run of short reads times out.
+        self._deadline = None
 
         self.baudrate = kwargs.get("baudrate") # None if key not found
-        if (self.baudrate == None and len(args) > 1):
-            self.baudrate = args[1]
-        else:
-            self._logger.warn('No baudrate provided, using default')
-            self.baudrate = dummyserial.constants.DEFAULT_BAUDRATE
+        if self.baudrate is None:
+            if len(args) > 1:
+                self.baudrate = args[1]
+            else:
+                self._logger.warn('No baudrate provided, using default')
+                self.baudrate = DEFAULT_BAUDRATE
 
         self.port = kwargs.get("port")
-        if (self.port == None and len(args) > 0):
-            self.port = args[0]
-        else:
-            raise IOError("No port provided")
+        if self.port is None:
+            if len(args) > 0:
+                self.port = args[0]
+            else:
+                raise IOError("No port provided")
 
         self.initial_port_name = self.port  # Initial name given to the port
 
         self.lookup = kwargs.get(
             'lookup', lookup.default)
-        self.lookup_func = lookup.default
+        self.lookup_func = self.lookup
         self.timeout = kwargs.get(
-            'timeout', dummyserial.constants.DEFAULT_TIMEOUT)
+            'timeout', DEFAULT_TIMEOUT)
         self.writeTimeout = self.timeout
 
-    def __repr__(self):
+        self._repr_prefix = f"{type(self).__module__}.{type(self).__name__}"
+
+        self.open()
+
+    def __repr__(self) -> str:
         """String representation of the DummySerial object."""
         return (
-            f"{self.__module__}."
-            f"{self.__class__.__name__}"
+            f"{self._repr_prefix}"
             f"<id=0x{id(self):x}, "
             f"open={self.is_open}"
             f">(port={self.port}, "
             f"timeout={self.timeout}, "
-            f"waiting_data={self._waiting_data})"
+            f"waiting_data={bytes(self._buf[self._pos:])!r})"
         )
 
-    def open(self):
-        """Open a (previously initialized) port."""
+    def open(self) -> None:
+        """
+        Open a (previously initialized) port.
+
+        Ports are opened on creation; opening an open port is a no-op.
+        """
         self._logger.debug('Opening port')
 
         if self.is_open:
-            raise SerialException('Port is already open.')
+            return
 
         self.is_open = True
         self.port = self.initial_port_name
 
-    def close(self):
+    def close(self) -> None:
         """Close a port on dummy_serial."""
         self._logger.debug('Closing port')
         if self.is_open:
             self.is_open = False
         self.port = None
 
-    def write(self, data):
+    def write(self, data: Any) -> None:
         """
         Write to a port on dummy_serial.
 
         Args:
-            data (string/bytes): data for sending to the port on
+            data (bytes): data for sending to the port on
             dummy_serial. Will affect the response for subsequent read
             operations.
+        """
+        if not self.is_open:
+            raise PortNotOpenError
+
+        if data.__class__ is not bytes:
+            raise dummyserial.exceptions.DSTypeError(
+                f'The input must be type bytes. Given: {data!r}')
+
+        if self._debug:
+            self._logger.debug('Writing (%s): "%s"', len(data), data)
+
+        # A new exchange starts: its short reads get a fresh timeout.
+        self._deadline = None
+
+        # Look up which data that should be waiting for subsequent read
+        # commands.
+        self._buf.extend(
+            self._check_response(self.lookup_func(data, DEFAULT_RESPONSE)))
 
-        Note that for Python2, the inputdata should be a **string**. For
-        Python3 it should be of type **bytes**.
+    def write_many(self, chunks: Iterable[Any]) -> None:
         """
-        self._logger.debug('Writing (%s): "%s"', len(data), data)
+        Write several chunks to a port on dummy_serial in one call.
 
+        Equivalent to calling :meth:`write` on each chunk in turn, but every
+        chunk is validated before any response is queued.
+
+        Args:
+            chunks (iterable of bytes): data for sending to the port on
+            dummy_serial.
+        """
         if not self.is_open:
             raise PortNotOpenError
 
-        if sys.version_info[0] > 2:
-            if not isinstance(data, bytes):
+        chunks = list(chunks)
+        for data in chunks:
+            if data.__class__ is not bytes:
                 raise dummyserial.exceptions.DSTypeError(
-                    'The input must be type bytes. Given:' + repr(data))
-            input_str = str(data, encoding='latin1')
-        else:
-            input_str = data
+                    f'The input must be type bytes. Given: {data!r}')
 
-        # Look up which data that should be waiting for subsequent read
-        # commands.
-        self._waiting_data = self.lookup_func(input_str, dummyserial.constants.DEFAULT_RESPONSE)
+        if self._debug:
+            self._logger.debug('Writing %s chunks', len(chunks))
+
+        self._deadline = None
 
-    def read(self, size=1):
+        lookup_func = self.lookup_func
+        check_response = self._check_response
+        self._buf.extend(b''.join([
+            check_response(lookup_func(data, DEFAULT_RESPONSE))
+            for data in chunks]))
+
+    def _check_response(self, response: Any) -> bytes:
+        """Returns response if the look-up function produced bytes."""
+        if not isinstance(response, bytes):
+            raise dummyserial.exceptions.DSTypeError(
+                'The look-up function must return bytes. '
+                f'Returned: {response!r}')
+        return response
+
+    def read(self, size: int = 1) -> bytes:
         """
         Read size bytes from the Dummy Serial Responses.
 
@@ -140,13 +225,15 @@ class Serial():
         Args:
             size (int): For compability with the real function.
 
-        Returns a **string** for Python2 and **bytes** for Python3.
+        Returns **bytes**.
 
         If the response is shorter than size, it will sleep for timeout.
+        Consecutive short reads share a single timeout.
 
         If the response is longer than size, it will return only size bytes.
         """
-        self._logger.debug('Reading %s bytes.', size)
+        if self._debug:
+            self._logger.debug('Reading %s bytes.', size)
 
         if not self.is_open:
             raise PortNotOpenError
@@ -158,103 +245,164 @@ class Serial():
 
         # Do the actual reading from the waiting data, and simulate the
         # influence of size.
-        if self._waiting_data == dummyserial.constants.DEFAULT_RESPONSE:
-            return_str = self._waiting_data
-        elif size == len(self._waiting_data):
-            return_str = self._waiting_data
-            self._waiting_data = dummyserial.constants.NO_DATA_PRESENT
-        elif size < len(self._waiting_data):
+        available = len(self._buf) - self._pos
+        if size > available:  # Wait for timeout - we asked for more data!
+            if self._debug:
+                self._logger.debug(
+                    'The size (%s) to read is larger than the available ' +
+                    'data. Will sleep until timeout. ' +
+                    'Available (%s)',
+                    size, available
+                )
+
+            self._wait_timeout()
+            size = available
+        else:
+            self._deadline = None
+            if self._debug and size < available:
+                self._logger.debug(
+                    'The size (%s) to read is smaller than the available ' +
+                    'data. Some bytes will be kept for later. ' +
+                    'Available (%s)',
+                    size, available
+                )
+
+        return_str = self._consume(size)
+
+        if self._debug:
             self._logger.debug(
-                'The size (%s) to read is smaller than the available data. ' +
-                'Some bytes will be kept for later. ' +
-                'Available (%s): "%s"',
-                size, len(self._waiting_data), self._waiting_data
+                'Read (%s): "%s"',
+                len(return_str), return_str
             )
 
-            return_str = self._waiting_data[:size]
-            self._waiting_data = self._waiting_data[size:]
-        else:  # Wait for timeout - we asked for more data than available!
-            self._logger.debug(
-                'The size (%s) to read is larger than the available data. ' +
-                'Will sleep until timeout. ' +
-                'Available (%s): "%s"',
-                size, len(self._waiting_data), self._waiting_data
-            )
+        return return_str
 
-            time.sleep(self.timeout)
-            return_str = self._waiting_data
-            self._waiting_data = dummyserial.constants.NO_DATA_PRESENT
+    def read_exact(self, size: int) -> bytes:
+        """
+        Read exactly size bytes from the Dummy Serial Responses.
 
-        self._logger.debug(
-            'Read (%s): "%s"',
-            len(return_str), return_str
-        )
+        Unlike :meth:`read`, this never sleeps: asking for more bytes than
+        are waiting raises :class:`dummyserial.exceptions.DSIOError` and
+        leaves the waiting data untouched.
+        """
+        if not self.is_open:
+            raise PortNotOpenError
 
-        if sys.version_info[0] > 2:  # Convert types to make it python3 compat.
-            if type(return_str) == str:
-                return bytes(return_str, encoding='latin1')
-            elif type(return_str) == bytes:
-                return(return_str)
-            else:
-                print(type(return_str))
-                print(return_str)
-                raise IOError("Invalid return type in lookup func")
-        return return_str
+        if not 0 <= size <= len(self._buf) - self._pos:
+            raise dummyserial.exceptions.DSIOError(
+                f'Cannot read exactly {size} bytes, '
+                f'{len(self._buf) - self._pos} available.')
+
+        self._deadline = None
+        return self._consume(size)
 
-    def out_waiting(self):  # pylint: disable=C0103
+    def _wait_timeout(self) -> None:
+        """
+        Sleep until the current timeout expires.
+
+        The first short read starts a timeout of self.timeout seconds;
+        further short reads only wait out whatever is left of it, until a
+        read is fully served, the port is written to or it is flushed.
+        """
+        now = time.monotonic()
+        if self._deadline is None:
+            self._deadline = now + self.timeout
+        remaining = self._deadline - now
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def _consume(self, size: int) -> bytes:
+        """
+        Take size bytes off the front of the waiting data.
+
+        Advancing the cursor is O(1); the consumed prefix is deleted when
+        everything has been read or when it grows past
+        :data:`dummyserial.constants.BUFFER_COMPACT_SIZE`.
+        """
+        start = self._pos
+        self._pos = start + size
+        with memoryview(self._buf) as view:
+            data = bytes(view[start:self._pos])
+
+        if self._pos == len(self._buf):
+            self._buf.clear()
+            self._pos = 0
+        elif self._pos > BUFFER_COMPACT_SIZE:
+            del self._buf[:self._pos]
+            self._pos = 0
+        return data
+
+    def out_waiting(self) -> int:  # pylint: disable=C0103
         """Returns length of waiting output data."""
-        return len(self._waiting_data)
+        return len(self._buf) - self._pos
 
-    def isOpen(self):  # pylint: disable=C0103
+    def isOpen(self) -> bool:  # pylint: disable=C0103
         """Return wheather or not the connection is open"""
         return self.is_open
 
-    def flushInput(self):
+    def flushInput(self) -> None:
         """Flushes input"""
         self._logger.debug("Input flush")
 
-    def flush(self):
+    def flush(self) -> None:
         """Flushes input and output"""
         self._logger.debug("Complete flush")
-        self._waiting_data = dummyserial.constants.NO_DATA_PRESENT
+        self._buf.clear()
+        self._pos = 0
+        self._deadline = None
 
-    def flushOutput(self):
+    def flushOutput(self) -> None:
         """Flushes output"""
         self._logger.debug("Output flush")
-        self._waiting_data = dummyserial.constants.NO_DATA_PRESENT
+        self._buf.clear()
+        self._pos = 0
+        self._deadline = None
 
-    def fileno(self):
+    def fileno(self) -> int:
         self._logger.warn("fileno is used but is not multiplatform")
         return 1
 
-    def inWaiting(self):
+    def inWaiting(self) -> int:
         """
         Always instant because the module is fake
         """
-        return False
+        return 0
 
-    def readline(self, size=None):
+    def readline(self, size: Optional[int] = None) -> bytes:
         """
-        Read until b'\n'.
-        Older version have a size arguments but that is wrong
+        Read until b'\n' (included in the returned line), or sleep for
+        timeout and return the remaining data when no terminator is waiting.
+
+        Args:
+            size (int): Optional maximum number of bytes to return, as in
+            pySerial. The line is cut there without waiting for timeout.
         """
-        if size != None:
-            self._logger.warn("readline should not have an argument")
-            return(self.read(size))
-
-        stop = False
-        bstr = b''
-        self._logger.setLevel(logging.WARN)
-        while not stop:
-            char = self.read(1)
-            if char == b'\n':
-                stop = True
-            else:
-                bstr += char
-        self._logger.setLevel(logging.DEBUG)
-        self._logger.debug(
-            'Readline: "%s"',
-            bstr)
+        if not self.is_open:
+            raise PortNotOpenError
+
+        # Let bytearray.find (memchr) scan the waiting data for the line
+        # terminator, bounded by size when one is given.
+        pos = self._pos
+        end = len(self._buf)
+        limited = False
+        if size is not None and 0 <= size <= end - pos:
+            end = pos + size
+            limited = True
+        idx = self._buf.find(b'\n', pos, end)
+        if idx < 0:  # No terminator: return what we have.
+            if not limited:
+                self._wait_timeout()
+            idx = end - 1
+        else:
+            self._deadline = None
+        bstr = self._consume(idx + 1 - pos)
+
+        if self._debug:
+            self._logger.debug(
+                'Readline: "%s"',
+                bstr)
         return(bstr)
 
-    outWaiting = out_waiting  # pyserial 2.7 / 3.0 compat.
+    def outWaiting(self) -> int:  # pylint: disable=C0103
+        """Returns length of waiting output data (pyserial 2.7 / 3.0)."""
+        return self.out_waiting()
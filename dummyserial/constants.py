@@ -24,6 +24,10 @@ DEFAULT_BAUDRATE = 9600
 # Response when no matching message (key) is found in the look-up dictionary.
 # * Should not be an empty string, as that is interpreted as
 #   "no data available on port".
-DEFAULT_RESPONSE = 'NONE'
+DEFAULT_RESPONSE = b'NONE'
 
-NO_DATA_PRESENT = ''
+NO_DATA_PRESENT = b''
+
+# Consumed bytes are dropped from the front of the receive buffer once the
+# read cursor passes this offset (or once everything has been read).
+BUFFER_COMPACT_SIZE = 64 * 1024
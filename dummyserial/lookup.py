@@ -5,12 +5,44 @@
 
 import logging
 
-def default(in_str, ans_when_invalid):
+_logger = logging.getLogger(__name__)
+
+# Set once default() has warned, so the warning is only logged on its first
+# call and never for users who override the look-up function.
+_warned = False
+
+
+def default(in_bytes, ans_when_invalid):
     """
     Default dummy. Echoes input and answer invalid when
-    no string is input.
+    no bytes are input.
+
+    Look-up functions take the written **bytes** and the default response
+    and return the **bytes** to be read back.
     """
-    logging.warning("I am a bogus look-up function, please vverride me!")
-    if len(in_str) == 0:
+    global _warned  # pylint: disable=W0603
+    if not _warned:
+        _warned = True
+        _logger.warning(
+            "I am a bogus look-up function, please override me!")
+
+    if len(in_bytes) == 0:
         return(ans_when_invalid)
-    return(in_str)
+    return(in_bytes)
+
+
+def compile_table(mapping):
+    """
+    Build a look-up function from a table of written bytes to responses.
+
+    Writes that are not in the table are answered with the default
+    response. The table is copied, so later changes to mapping are not
+    seen by the returned function.
+    """
+    get = dict(mapping).get
+
+    def table(in_bytes, ans_when_invalid):
+        """Answers in_bytes from the compiled table."""
+        return get(in_bytes, ans_when_invalid)
+
+    return table
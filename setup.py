@@ -30,6 +30,18 @@ def publish():
 publish()
 
 
+def ext_modules():
+    """
+    Compiles dummyserial.classes with mypyc when DUMMYSERIAL_USE_MYPYC=1.
+
+    The pure Python package is built otherwise.
+    """
+    if os.environ.get('DUMMYSERIAL_USE_MYPYC') != '1':
+        return []
+    from mypyc.build import mypycify
+    return mypycify(['dummyserial/classes.py'])
+
+
 setuptools.setup(
     name='dummyserial',
     version=__version__,
@@ -45,5 +57,6 @@ setuptools.setup(
     install_requires=['pyserial >= 2.7'],
     package_dir={'dummyserial': 'dummyserial'},
     zip_safe=False,
-    include_package_data=True
+    include_package_data=True,
+    ext_modules=ext_modules()
 )
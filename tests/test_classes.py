@@ -4,7 +4,10 @@
 """Tests for Dummy Serial Classes."""
 
 import random
+import time
 import unittest
+import weakref
+from unittest import mock
 import logging
 import logging.handlers
 
@@ -68,19 +71,21 @@ class DummySerialTest(unittest.TestCase):  # pylint: disable=R0904
         ds_instance = dummyserial.Serial(
             port=self.random_serial_port,
             baudrate=self.random_baudrate,
-            ds_responses={rand_write_str1: rand_write_str2}
+            lookup=dummyserial.lookup.compile_table(
+                {str.encode(rand_write_str1): str.encode(rand_write_str2)})
         )
 
         ds_instance.write(str.encode(rand_write_str1))
 
-        read_data = ''
+        read_data = b''
         while 1:
-            read_data = ''.join([read_data, ds_instance.read(rand_write_len2).decode()])
+            read_data = b''.join(
+                [read_data, ds_instance.read(rand_write_len2)])
             waiting_data = ds_instance.outWaiting()
             if not waiting_data:
                 break
 
-        self.assertEqual(read_data, rand_write_str2)
+        self.assertEqual(read_data, str.encode(rand_write_str2))
 
     def test_write_closed_port(self):
         """Tests writing-to a closed Dummy Serial port."""
@@ -102,6 +107,52 @@ class DummySerialTest(unittest.TestCase):  # pylint: disable=R0904
             ds_instance.write(rand_write_str1)
         self.assertFalse(ds_instance.is_open)  # pylint: disable=W0212
 
+    def test_write_non_bytes(self):
+        """Tests writing something other than bytes to a Dummy Serial port."""
+        ds_instance = dummyserial.Serial(
+            port=self.random_serial_port,
+            baudrate=self.random_baudrate
+        )
+
+        with self.assertRaises(dummyserial.DSTypeError):
+            ds_instance.write(random.randint(0, 1024))
+
+    def test_write_invalid_lookup_response(self):  # pylint: disable=C0103
+        """Tests a look-up function that does not return bytes."""
+        rand_write_str = str.encode(self.random(random.randint(1, 64)))
+
+        for response in (rand_write_str.decode(), list(rand_write_str)):
+            ds_instance = dummyserial.Serial(
+                port=self.random_serial_port,
+                baudrate=self.random_baudrate,
+                lookup=dummyserial.lookup.compile_table(
+                    {rand_write_str: response})
+            )
+
+            with self.assertRaises(dummyserial.DSTypeError):
+                ds_instance.write(rand_write_str)
+            with self.assertRaises(dummyserial.DSTypeError):
+                ds_instance.write_many([b'', rand_write_str])
+            self.assertEqual(ds_instance.outWaiting(), 0)
+
+    def test_patch_port(self):
+        """Tests patching a Dummy Serial port like a pySerial one."""
+        rand_write_str = str.encode(self.random(random.randint(1, 64)))
+
+        ds_instance = dummyserial.Serial(
+            port=self.random_serial_port,
+            baudrate=self.random_baudrate
+        )
+
+        ds_instance.dtr = True
+        ds_instance.write_timeout = 1
+        self.assertTrue(ds_instance.dtr)
+        self.assertIs(weakref.ref(ds_instance)(), ds_instance)
+
+        with mock.patch.object(
+                ds_instance, 'read', return_value=rand_write_str):
+            self.assertEqual(ds_instance.read(), rand_write_str)
+
     def test_write_and_read_to_closed_port(self):
         """Tests writing-to and reading-from a closed Dummy Serial port."""
         rand_write_len1 = random.randint(0, 1024)
@@ -139,7 +190,7 @@ class DummySerialTest(unittest.TestCase):  # pylint: disable=R0904
         self.assertTrue(self.random_serial_port in str(ds_instance))
 
     def test_open_port(self):
-        """Tests opening an already-open Dummy Serial port."""
+        """Tests opening an already-open and a closed Dummy Serial port."""
         rand_write_len1 = random.randint(0, 1024)
         rand_write_len2 = random.randint(0, 1024)
         rand_write_str1 = self.random(rand_write_len1)
@@ -152,8 +203,8 @@ class DummySerialTest(unittest.TestCase):  # pylint: disable=R0904
         )
 
         self.assertTrue(ds_instance.is_open)  # pylint: disable=W0212
-        with self.assertRaises(SerialException):
-            ds_instance.open()
+        ds_instance.open()
+        self.assertTrue(ds_instance.is_open)  # pylint: disable=W0212
         ds_instance.close()
         self.assertFalse(ds_instance.is_open)  # pylint: disable=W0212
         ds_instance.open()
@@ -184,14 +235,18 @@ class DummySerialTest(unittest.TestCase):  # pylint: disable=R0904
 
         ds_instance = dummyserial.Serial(
             port=self.random_serial_port,
-            baudrate=self.random_baudrate
+            baudrate=self.random_baudrate,
+            lookup=dummyserial.lookup.compile_table(
+                {str.encode(rand_write_str1):
+                 dummyserial.constants.NO_DATA_PRESENT})
         )
 
         ds_instance.write(str.encode(rand_write_str1))
 
-        read_data = ''
+        read_data = b''
         while 1:
-            read_data = ''.join([read_data, ds_instance.read(rand_write_len2).decode()])
+            read_data = b''.join(
+                [read_data, ds_instance.read(rand_write_len2)])
             waiting_data = ds_instance.outWaiting()
             if not waiting_data:
                 break
@@ -199,6 +254,91 @@ class DummySerialTest(unittest.TestCase):  # pylint: disable=R0904
         self.assertEqual(
             dummyserial.constants.NO_DATA_PRESENT, read_data)
 
+    def test_write_and_read_lookup_table(self):  # pylint: disable=C0103
+        """Tests answering writes from a compiled look-up table."""
+        rand_write_str1 = str.encode(self.random(random.randint(1, 1024)))
+        rand_write_str2 = str.encode(self.random(random.randint(1, 1024)))
+
+        ds_instance = dummyserial.Serial(
+            port=self.random_serial_port,
+            baudrate=self.random_baudrate,
+            lookup=dummyserial.lookup.compile_table(
+                {rand_write_str1: rand_write_str2})
+        )
+
+        ds_instance.write(rand_write_str1)
+        self.assertEqual(
+            ds_instance.read(len(rand_write_str2)), rand_write_str2)
+
+        ds_instance.write(rand_write_str2)
+        self.assertEqual(
+            ds_instance.read(len(dummyserial.constants.DEFAULT_RESPONSE)),
+            dummyserial.constants.DEFAULT_RESPONSE)
+
+    def test_write_many_and_read_exact(self):
+        """Tests batch writing and exact reading on a Dummy Serial port."""
+        rand_write_strs = [
+            str.encode(self.random(random.randint(1, 64)))
+            for _ in range(random.randint(1, 16))
+        ]
+
+        ds_instance = dummyserial.Serial(
+            port=self.random_serial_port,
+            baudrate=self.random_baudrate
+        )
+
+        ds_instance.write_many(rand_write_strs)
+        for rand_write_str in rand_write_strs:
+            self.assertEqual(
+                ds_instance.read_exact(len(rand_write_str)), rand_write_str)
+
+        with self.assertRaises(dummyserial.DSIOError):
+            ds_instance.read_exact(1)
+        with self.assertRaises(dummyserial.DSTypeError):
+            ds_instance.write_many([b'', self.random()])
+        self.assertEqual(ds_instance.outWaiting(), 0)
+
+    def test_short_reads_share_timeout(self):
+        """Tests that consecutive short reads only wait out one timeout."""
+        timeout = 0.2
+
+        ds_instance = dummyserial.Serial(
+            port=self.random_serial_port,
+            baudrate=self.random_baudrate,
+            timeout=timeout
+        )
+
+        start = time.monotonic()
+        for _ in range(5):
+            self.assertEqual(ds_instance.read(random.randint(1, 1024)), b'')
+        self.assertGreaterEqual(time.monotonic() - start, timeout)
+        self.assertLess(time.monotonic() - start, 2 * timeout)
+
+    def test_write_restarts_timeout(self):
+        """Tests that a short read after a write waits a full timeout."""
+        timeout = 0.2
+
+        ds_instance = dummyserial.Serial(
+            port=self.random_serial_port,
+            baudrate=self.random_baudrate,
+            timeout=timeout
+        )
+
+        ds_instance.read(1)
+        time.sleep(timeout)
+
+        rand_write_str = str.encode(self.random(random.randint(1, 64)))
+        ds_instance.write(rand_write_str)
+        start = time.monotonic()
+        self.assertEqual(
+            ds_instance.read(len(rand_write_str) + 1), rand_write_str)
+        self.assertGreaterEqual(time.monotonic() - start, timeout)
+
+        ds_instance.write_many([rand_write_str])
+        start = time.monotonic()
+        self.assertEqual(ds_instance.readline(), rand_write_str)
+        self.assertGreaterEqual(time.monotonic() - start, timeout)
+
 
 if __name__ == '__main__':
     unittest.main()